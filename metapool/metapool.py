@@ -2,10 +2,11 @@ import json
 import re
 import numpy as np
 import pandas as pd
-import string
 import seaborn as sns
 import matplotlib.pyplot as plt
 import warnings
+from functools import lru_cache
+from io import StringIO
 from random import choices
 from configparser import ConfigParser
 from qiita_client import QiitaClient
@@ -432,29 +433,34 @@ def format_dna_norm_picklist(dna_vols, water_vols, wells, dest_wells=None,
                           ' or sample_names %r') %
                          (dna_vols.shape, dna_concs.shape, sample_names.shape))
 
-    picklist = ''
+    # write into a buffer rather than growing one string per row
+    picklist = StringIO()
 
     # header
-    picklist += ('Sample\tSource Plate Name\tSource Plate Type\tSource Well\t'
-                 'Concentration\tTransfer Volume\tDestination Plate Name\t'
-                 'Destination Well')
+    picklist.write('Sample\tSource Plate Name\tSource Plate Type\t'
+                   'Source Well\tConcentration\tTransfer Volume\t'
+                   'Destination Plate Name\tDestination Well')
 
     # water additions
     for index, sample in np.ndenumerate(sample_names):
-        picklist += '\n' + '\t'.join([str(sample), water_plate_name,
-                                      water_plate_type, str(wells[index]),
-                                      str(dna_concs[index]),
-                                      str(water_vols[index]),
-                                      dest_plate_name, str(dest_wells[index])])
+        picklist.write('\n' + '\t'.join([str(sample), water_plate_name,
+                                         water_plate_type, str(wells[index]),
+                                         str(dna_concs[index]),
+                                         str(water_vols[index]),
+                                         dest_plate_name,
+                                         str(dest_wells[index])]))
     # DNA additions
     for index, sample in np.ndenumerate(sample_names):
-        picklist += '\n' + '\t'.join([str(sample), str(sample_plates[index]),
-                                      str(dna_plate_type[index]),
-                                      str(wells[index]), str(dna_concs[index]),
-                                      str(dna_vols[index]),
-                                      dest_plate_name, str(dest_wells[index])])
+        picklist.write('\n' + '\t'.join([str(sample),
+                                         str(sample_plates[index]),
+                                         str(dna_plate_type[index]),
+                                         str(wells[index]),
+                                         str(dna_concs[index]),
+                                         str(dna_vols[index]),
+                                         dest_plate_name,
+                                         str(dest_wells[index])]))
 
-    return picklist
+    return picklist.getvalue()
 
 
 def assign_index(samples, index_df, start_idx=0):
@@ -510,36 +516,39 @@ def format_index_picklist(sample_names, sample_wells, indices,
                           'sample_wells (%s) or index list (%s)') %
                          (len(sample_names), len(sample_wells), len(indices)))
 
-    picklist = ''
+    # write into a buffer rather than growing one string per row
+    picklist = StringIO()
 
     # header
-    picklist += ('Sample\tSource Plate Name\tSource Plate Type\tSource Well\t'
-                 'Transfer Volume\tIndex Name\tIndex Sequence\tIndex Combo\t'
-                 'Destination Plate Name\tDestination Well')
+    picklist.write('Sample\tSource Plate Name\tSource Plate Type\t'
+                   'Source Well\tTransfer Volume\tIndex Name\t'
+                   'Index Sequence\tIndex Combo\tDestination Plate Name\t'
+                   'Destination Well')
 
     # i5 additions
     for i, (sample, well) in enumerate(zip(sample_names, sample_wells)):
-        picklist += '\n' + '\t'.join([str(sample), indices.iloc[i]['i5 plate'],
-                                      i5_plate_type,
-                                      indices.iloc[i]['i5 well'], str(
-                                          i5_vol), indices.iloc[i]['i5 name'],
-                                      indices.iloc[i]['i5 sequence'], str(
-                                          indices.iloc[i]['index combo']),
-                                      dest_plate_name, well])
+        index = indices.iloc[i]
+        picklist.write('\n' + '\t'.join([str(sample), index['i5 plate'],
+                                         i5_plate_type, index['i5 well'],
+                                         str(i5_vol), index['i5 name'],
+                                         index['i5 sequence'],
+                                         str(index['index combo']),
+                                         dest_plate_name, well]))
     # i7 additions
     for i, (sample, well) in enumerate(zip(sample_names, sample_wells)):
-        picklist += '\n' + '\t'.join([str(sample), indices.iloc[i]['i7 plate'],
-                                      i7_plate_type,
-                                      indices.iloc[i]['i7 well'], str(
-                                          i7_vol), indices.iloc[i]['i7 name'],
-                                      indices.iloc[i]['i7 sequence'], str(
-                                          indices.iloc[i]['index combo']),
-                                      dest_plate_name, well])
+        index = indices.iloc[i]
+        picklist.write('\n' + '\t'.join([str(sample), index['i7 plate'],
+                                         i7_plate_type, index['i7 well'],
+                                         str(i7_vol), index['i7 name'],
+                                         index['i7 sequence'],
+                                         str(index['index combo']),
+                                         dest_plate_name, well]))
 
-    return picklist
+    return picklist.getvalue()
 
 
-def compute_qpcr_concentration(cp_vals, m=-3.231, b=12.059, dil_factor=25000):
+def compute_qpcr_concentration(cp_vals, m=-3.231, b=12.059, dil_factor=25000,
+                               dtype=np.float64):
     """Computes molar concentration of libraries from qPCR Cp values.
 
     Returns a 2D array of calculated concentrations, in nanomolar units
@@ -554,13 +563,24 @@ def compute_qpcr_concentration(cp_vals, m=-3.231, b=12.059, dil_factor=25000):
         The intercept of the qPCR standard curve
     dil_factor: float or int
         The dilution factor of the samples going into the qPCR
+    dtype: numpy float type
+        The precision to compute in. np.float32 halves the memory traffic
+        and still resolves the Cp values well beyond instrument precision,
+        but results will differ from the default in the last digits.
 
     Returns
     -------10
     np.array of floats
         A 2D array of floats
     """
-    qpcr_concentration = np.power(10, ((cp_vals - b) / m)) * dil_factor / 1000
+    cp_vals = np.asarray(cp_vals, dtype=dtype)
+
+    # evaluate in a single buffer to avoid an intermediate per ufunc
+    qpcr_concentration = np.subtract(cp_vals, b)
+    qpcr_concentration /= m
+    np.power(10, qpcr_concentration, out=qpcr_concentration)
+    qpcr_concentration *= dil_factor
+    qpcr_concentration /= 1000
 
     return qpcr_concentration
 
@@ -584,14 +604,15 @@ def compute_shotgun_pooling_values_eqvol(sample_concs, total_vol=60.0):
     """
     per_sample_vol = (total_vol / sample_concs.size) * 1000.0
 
-    sample_vols = np.zeros(sample_concs.shape) + per_sample_vol
+    sample_vols = np.full(sample_concs.shape, per_sample_vol, dtype=np.float64)
 
     return sample_vols
 
 
 def compute_shotgun_pooling_values_qpcr(sample_concs, sample_fracs=None,
                                         min_conc=10, floor_conc=50,
-                                        total_nmol=.01):
+                                        total_nmol=.01, *, out=None,
+                                        dtype=np.float64):
     """Computes pooling volumes for samples based on qPCR estimates of
     nM concentrations (`sample_concs`).
 
@@ -623,32 +644,53 @@ def compute_shotgun_pooling_values_qpcr(sample_concs, sample_fracs=None,
         corresponds to a maximum vol in pool
     total_nmol : float
         total number of nM to have in pool
+    out: 2D array of float, optional
+        array with the same shape as `sample_concs` to write the volumes
+        into, e.g. to reuse one buffer when sweeping over the thresholds.
+        Its previous contents are overwritten, it can be `sample_concs`.
+    dtype: numpy float type
+        The precision to compute in, see `compute_qpcr_concentration`. The
+        normalizing total is always summed in double precision.
 
     Returns
     -------
     sample_vols: np.array of floats
-        the volumes in nL per each sample pooled
+        the volumes in nL per each sample pooled, this is `out` if it was
+        passed
     """
+    # work on contiguous float64 data, e.g. integer plates or object plates
+    # would otherwise go through casting or per-element Python loops
+    sample_concs = np.ascontiguousarray(sample_concs, dtype=dtype)
 
+    # equal molar pooling only needs the scalar fraction, which broadcasts
+    # without allocating a plate of identical values
     if sample_fracs is None:
-        sample_fracs = np.ones(sample_concs.shape) / sample_concs.size
+        sample_fracs = 1.0 / sample_concs.size
+    else:
+        sample_fracs = np.ascontiguousarray(sample_fracs, dtype=dtype)
 
-    # get samples above threshold
-    sample_fracs_pass = sample_fracs.copy()
-    sample_fracs_pass[sample_concs <= min_conc] = 0
+    if out is None:
+        sample_vols = np.empty(sample_concs.shape, dtype=dtype)
+    elif out.shape != sample_concs.shape:
+        raise ValueError('out must have the same shape as sample_concs')
+    else:
+        sample_vols = out
 
-    # renormalize to exclude lost samples
-    sample_fracs_pass *= 1/sample_fracs_pass.sum()
+    # read everything needed from the concentrations before writing, `out`
+    # may be the concentrations themselves
+    below_min = sample_concs <= min_conc
+    floored_concs = np.maximum(sample_concs, floor_conc)
 
-    # floor concentration value
-    sample_concs_floor = sample_concs.copy()
-    sample_concs_floor[sample_concs < floor_conc] = floor_conc
+    # get samples above threshold
+    np.copyto(sample_vols, sample_fracs)
+    sample_vols[below_min] = 0.0
 
-    # calculate volumetric fractions including floor val
-    sample_vols = (total_nmol * sample_fracs_pass) / sample_concs_floor
+    # renormalize to exclude lost samples, scale to the total pool size and
+    # convert L to nL in a single pass
+    sample_vols *= total_nmol * 10**9 / sample_vols.sum(dtype=np.float64)
 
-    # convert L to nL
-    sample_vols *= 10**9
+    # calculate volumetric fractions including floor val
+    sample_vols /= floored_concs
 
     return sample_vols
 
@@ -699,7 +741,7 @@ def compute_shotgun_pooling_values_qpcr_minvol(sample_concs, sample_fracs=None,
     """
 
     if sample_fracs is None:
-        sample_fracs = np.ones(sample_concs.shape) / sample_concs.size
+        sample_fracs = 1.0 / sample_concs.size
 
     # calculate volumetric fractions including floor val
     sample_vols = (total_nmol * sample_fracs) / sample_concs
@@ -729,23 +771,117 @@ def estimate_pool_conc_vol(sample_vols, sample_concs):
         The estimated actual concentration of the pool, in nM
     total_vol : float
         The total volume of the pool, in nL
+
+    Notes
+    -----
+    Series are paired by their index labels and missing (NaN) values are
+    skipped, like in any pandas sum. In numpy arrays a missing value makes
+    the results NaN.
     """
     # scalar to adjust nL to L for molarity calculations
     nl_scalar = 10**-9
 
-    # calc total pool pmols
-    total_pmols = np.multiply(sample_concs, sample_vols) * nl_scalar
+    if isinstance(sample_vols, pd.Series) or \
+            isinstance(sample_concs, pd.Series):
+        # pair the wells of two Series by label, like their product does
+        if isinstance(sample_vols, pd.Series) and \
+                isinstance(sample_concs, pd.Series):
+            sample_vols, sample_concs = sample_vols.align(sample_concs)
+
+        # calc total pool pmols
+        total_pmols = (sample_concs * sample_vols).sum() * nl_scalar
+    else:
+        # reduce in double precision, also for single precision pooling
+        # values
+        sample_concs = np.ravel(sample_concs).astype(np.float64, copy=False)
+        sample_vols = np.ravel(sample_vols).astype(np.float64, copy=False)
+
+        # calc total pool pmols
+        total_pmols = np.dot(sample_concs, sample_vols) * nl_scalar
 
     # calc total pool vol in nanoliters
     total_vol = sample_vols.sum()
 
     # pool pM is total pmols divided by total liters
     # (total vol in nL * 1 L / 10^9 nL)
-    pool_conc = total_pmols.sum() / (total_vol * nl_scalar)
+    pool_conc = total_pmols / (total_vol * nl_scalar)
 
     return pool_conc, total_vol
 
 
+@lru_cache(maxsize=8)
+def _plate_labels(rows, cols):
+    """Row letters and column numbers of a plate with the given shape
+
+    The arrays are cached and shared between callers, so they are read-only.
+    """
+    row_labels = np.array([chr(ord('A') + i) for i in range(rows)])
+    col_labels = np.arange(1, cols + 1).astype(str)
+
+    row_labels.flags.writeable = False
+    col_labels.flags.writeable = False
+
+    return row_labels, col_labels
+
+
+@lru_cache(maxsize=8)
+def _well_names(rows, cols):
+    """Well names ('A1', 'A2', ...) of a plate with the given shape, in row
+    major order
+
+    The array is cached and shared between callers, so it is read-only.
+    """
+    row_labels, col_labels = _plate_labels(rows, cols)
+
+    well_names = np.char.add(np.repeat(row_labels, cols),
+                             np.tile(col_labels, rows))
+    well_names.flags.writeable = False
+
+    return well_names
+
+
+def _pack_destination_wells(vols, max_vol):
+    """Destination index of each pooled volume, moving on to the next
+    destination whenever the running total would exceed `max_vol`
+
+    The running total is sequential, and a plain loop over Python floats is
+    faster than rescanning the remaining wells with NumPy per destination.
+    """
+    dest_idx = []
+
+    running_tot = 0
+    d = 1
+    for vol in vols.tolist():
+        # test to see if we will exceed total vol per well
+        if running_tot + vol > max_vol:
+            d += 1
+            running_tot = vol
+        else:
+            running_tot += vol
+
+        dest_idx.append(d)
+
+    return dest_idx
+
+
+@lru_cache(maxsize=8)
+def _dest_well_names(size, dest_rows, dest_cols):
+    """Names of the pooling destination wells 0 to `size`, as numbered by
+    format_pooling_echo_pick_list
+
+    The array is cached and shared between callers, so it is read-only.
+    """
+    dest_idx = np.arange(size + 1)
+
+    letters = np.array([chr(ord('A') + i)
+                        for i in range(size // dest_rows + 1)])
+    dest_wells = np.char.add(letters[dest_idx // dest_rows],
+                             (dest_idx % dest_cols).astype(str))
+    dest_wells.flags.writeable = False
+
+    return dest_wells
+
+
 def format_pooling_echo_pick_list(vol_sample,
                                   max_vol_per_well=60000,
                                   dest_plate_shape=[16, 24]):
@@ -758,40 +894,32 @@ def format_pooling_echo_pick_list(vol_sample,
     max_vol_per_well : 2d numpy array of floats
         Maximum destination well volume, in nL
     """
-    contents = ['Source Plate Name,Source Plate Type,Source Well,'
-                'Concentration,Transfer Volume,Destination Plate Name,'
-                'Destination Well']
+    contents = StringIO()
+    contents.write('Source Plate Name,Source Plate Type,Source Well,'
+                   'Concentration,Transfer Volume,Destination Plate Name,'
+                   'Destination Well')
     # Write the sample transfer volumes
     rows, cols = vol_sample.shape
 
     # replace NaN values with 0s to leave a trail of unpooled wells
-    pool_vols = np.nan_to_num(vol_sample)
+    pool_vols = np.nan_to_num(vol_sample).ravel()
 
-    running_tot = 0
-    d = 1
-    for i in range(rows):
-        for j in range(cols):
-            well_name = "%s%d" % (chr(ord('A') + i), j+1)
-            # Machine will round, so just give it enough info to do the
-            # correct rounding.
-            val = "%.2f" % pool_vols[i][j]
+    dest_idx = _pack_destination_wells(pool_vols, max_vol_per_well)
 
-            # test to see if we will exceed total vol per well
-            if running_tot + pool_vols[i][j] > max_vol_per_well:
-                d += 1
-                running_tot = pool_vols[i][j]
-            else:
-                running_tot += pool_vols[i][j]
+    well_names = _well_names(rows, cols).tolist()
 
-            dest = "%s%d" % (chr(ord('A') +
-                                 int(np.floor(d/dest_plate_shape[0]))),
-                             (d % dest_plate_shape[1]))
+    # each well moves on to at most one new destination, so the lookup table
+    # only depends on the plate shapes
+    dest_wells = _dest_well_names(pool_vols.size + 1,
+                                  *dest_plate_shape).tolist()
 
-            contents.append(
-                ",".join(['1', '384LDV_AQ_B2_HT', well_name, "",
-                          val, 'NormalizedDNA', dest]))
+    for well, val, d in zip(well_names, pool_vols.tolist(), dest_idx):
+        # Machine will round, so just give it enough info to do the correct
+        # rounding.
+        contents.write('\n1,384LDV_AQ_B2_HT,%s,,%.2f,NormalizedDNA,%s'
+                       % (well, val, dest_wells[d]))
 
-    return "\n".join(contents)
+    return contents.getvalue()
 
 
 def plot_plate_vals(dataset, color_map='YlGnBu', annot_str=None,
@@ -820,33 +948,46 @@ def plot_plate_vals(dataset, color_map='YlGnBu', annot_str=None,
     Returns
     -------
     """
+    row_labels, col_labels = _plate_labels(*dataset.shape)
+
     plt.figure(figsize=(20, 20))
 
     with sns.axes_style("white"):
         ax1 = plt.subplot2grid((40, 20), (20, 0), colspan=18, rowspan=18)
         ax1.xaxis.tick_top()
-        if annot_str is None:
-            sns.heatmap(dataset,
-                        ax=ax1,
-                        xticklabels=[x + 1 for x in range(dataset.shape[1])],
-                        yticklabels=list(string.ascii_uppercase)[
-                            0:dataset.shape[0]],
-                        # square = True,
-                        annot=True,
-                        fmt='.0f',
-                        cmap=color_map,
-                        cbar=False)
-        else:
-            sns.heatmap(dataset,
-                        ax=ax1,
-                        xticklabels=[x + 1 for x in range(dataset.shape[1])],
-                        yticklabels=list(string.ascii_uppercase)[
-                            0:dataset.shape[0]],
-                        # square = True,
-                        annot=annot_str,
-                        fmt=annot_fmt,
-                        cmap=color_map,
-                        cbar=False)
+
+        # draw the plate as a single rasterized mesh, which is much cheaper
+        # to render and save than a vector patch per well
+        plate = np.ma.masked_invalid(np.asarray(dataset, dtype=float))
+        mesh = ax1.pcolormesh(plate, cmap=color_map, rasterized=True)
+
+        rows, cols = plate.shape
+        ax1.set(xlim=(0, cols), ylim=(rows, 0),
+                xticks=np.arange(cols) + 0.5, xticklabels=col_labels,
+                yticks=np.arange(rows) + 0.5, yticklabels=row_labels)
+        sns.despine(ax=ax1, left=True, bottom=True)
+
+        # the default numeric labels are not legible beyond a 384 well
+        # plate, annotations passed by the caller are always drawn
+        if annot_str is None and plate.size <= 512:
+            annot_str, annot_fmt = plate.filled(np.nan), '.0f'
+
+        if annot_str is not None:
+            # relative luminance of the well colors (WCAG 2.0), for the same
+            # contrast rule seaborn uses in annotated heatmaps
+            rgb = mesh.to_rgba(plate)[..., :3]
+            rgb = np.where(rgb <= .03928, rgb / 12.92,
+                           ((rgb + .055) / 1.055) ** 2.4)
+            lum = rgb @ [.2126, .7152, .0722]
+
+            empty = np.ma.getmaskarray(plate)
+            for (i, j), value in np.ndenumerate(annot_str):
+                if empty[i, j]:
+                    continue
+
+                ax1.text(j + 0.5, i + 0.5, format(value, annot_fmt),
+                         ha='center', va='center',
+                         color='.15' if lum[i, j] > .408 else 'w')
 
     with sns.axes_style("white"):
         ax2 = plt.subplot2grid((40, 20), (38, 0), colspan=18, rowspan=2)
@@ -860,12 +1001,46 @@ def plot_plate_vals(dataset, color_map='YlGnBu', annot_str=None,
 
     with sns.axes_style():
         ax4 = plt.subplot2grid((40, 20), (0, 0), colspan=18, rowspan=18)
-        sns.distplot(dataset.flatten()[~np.isnan(dataset.flatten())], ax=ax4,
-                     bins=20)
+        # the masked plate already excludes the empty wells
+        sns.histplot(plate.compressed(), bins=20, ax=ax4, kde=False)
 
     return
 
 
+def _parse_wells(wells):
+    """Zero-based row and column indices of well IDs in 'A1,B12' format
+
+    The IDs are parsed from their raw ASCII bytes, which avoids creating
+    intermediate Python strings for every well. Whitespace around an ID or
+    between its letter and number is ignored.
+    """
+    message = 'Well IDs must be a letter followed by a number'
+
+    try:
+        ids = np.char.strip(np.asarray(wells, dtype=str)).astype(bytes)
+    except UnicodeEncodeError:
+        raise ValueError(message) from None
+    buf = ids.view(np.uint8).reshape(ids.size, ids.itemsize)
+
+    # clearing the 0x20 bit upper-cases the row letter
+    row_idx = (buf[:, 0] & 0xDF).astype(int) - ord('A')
+
+    # shorter IDs are padded with null bytes, and the number may follow the
+    # letter after some whitespace
+    digits = buf[:, 1:].astype(int) - ord('0')
+    blank = (buf[:, 1:] == ord(' ')) | (buf[:, 1:] == ord('\t'))
+    padding = (buf[:, 1:] == 0) | np.logical_and.accumulate(blank, axis=1)
+    invalid = ((digits < 0) | (digits > 9))[~padding]
+    if ids.size and (ids.itemsize < 2 or invalid.any()):
+        raise ValueError(message)
+
+    col_idx = np.zeros(buf.shape[0], dtype=int)
+    for k in range(digits.shape[1]):
+        col_idx = np.where(padding[:, k], col_idx, col_idx * 10 + digits[:, k])
+
+    return row_idx, col_idx - 1
+
+
 def make_2D_array(qpcr, data_col='Cp', well_col='Pos', rows=16, cols=24):
     """
     Pulls a column of data out of a dataframe and puts into array format
@@ -886,16 +1061,25 @@ def make_2D_array(qpcr, data_col='Cp', well_col='Pos', rows=16, cols=24):
 
     Returns
     -------
+    cp_array: np.array
+        2D array of the values in `data_col`. Numeric columns give a float
+        array with NaN for empty wells, any other column gives an object
+        array with None for empty wells.
     """
-    # initialize empty Cp array
-    cp_array = np.empty((rows, cols), dtype=object)
+    values = qpcr[data_col].to_numpy()
+
+    # initialize empty Cp array; numeric data is kept as floats so that
+    # downstream calculations don't have to operate on Python objects
+    if np.issubdtype(values.dtype, np.number):
+        cp_array = np.full((rows, cols), np.nan, dtype=np.float64)
+    else:
+        cp_array = np.empty((rows, cols), dtype=object)
 
-    # fill Cp array with the post-cleaned values from the right half of the
-    # plate
-    for record in qpcr.iterrows():
-        row = ord(str.upper(record[1][well_col][0])) - ord('A')
-        col = int(record[1][well_col][1:]) - 1
-        cp_array[row, col] = record[1][data_col]
+    # parse the well IDs into row and column indices for the whole column at
+    # once, then fill Cp array with the post-cleaned values from the right
+    # half of the plate
+    row_idx, col_idx = _parse_wells(qpcr[well_col])
+    cp_array[row_idx, col_idx] = values
 
     return cp_array
 
@@ -928,26 +1112,33 @@ def combine_dfs(qpcr_df, dna_picklist, index_picklist):
     combined_df.set_index('Well', inplace=True)
 
     b = dna_picklist.loc[dna_picklist['Source Plate Name'] != 'water',
-                         ].set_index('Destination Well')
-    c = index_picklist.loc[index_picklist['Source Plate Name'] ==
-                           'i7 Source Plate', ].set_index('Destination Well')
-    d = index_picklist.loc[index_picklist['Source Plate Name'] ==
-                           'i5 Source Plate', ].set_index('Destination Well')
-
-    # Add DNA conc columns
-    combined_df['DNA Concentration'] = b['Concentration']
-    combined_df['DNA Transfer Volume'] = b['Transfer Volume']
-
-    # Add Index columns
-    combined_df['Sample Name'] = c['Sample Name']
-    combined_df['Plate'] = c['Plate']
-    combined_df['Counter'] = d['Counter']
-    combined_df['Source Well i7'] = c['Source Well']
-    combined_df['Index i7'] = c['Index']
-    combined_df['Primer i7'] = c['Primer']
-    combined_df['Source Well i5'] = d['Source Well']
-    combined_df['Index i5'] = d['Index']
-    combined_df['Primer i5'] = d['Primer']
+                         ['Destination Well', 'Concentration',
+                          'Transfer Volume']].set_index('Destination Well')
+
+    # split the index picklist by source plate in a single pass
+    index_plates = {name: plate.set_index('Destination Well')
+                    for name, plate in
+                    index_picklist.groupby('Source Plate Name')}
+    no_plate = index_picklist.iloc[:0].set_index('Destination Well')
+    c = index_plates.get('i7 Source Plate', no_plate)
+    d = index_plates.get('i5 Source Plate', no_plate)
+
+    # joining on a repeated well would silently duplicate the qPCR rows
+    for name, plate in (('DNA', b), ('i7 index', c), ('i5 index', d)):
+        if not plate.index.is_unique:
+            raise ValueError('The %s picklist has repeated destination '
+                             'wells' % name)
+
+    index_cols = ['Source Well', 'Index', 'Primer']
+
+    # Add DNA conc and Index columns with a single join on the well
+    combined_df = combined_df.join([
+        b.rename(columns={'Concentration': 'DNA Concentration',
+                          'Transfer Volume': 'DNA Transfer Volume'}),
+        c[['Sample Name', 'Plate']],
+        d[['Counter']],
+        c[index_cols].add_suffix(' i7'),
+        d[index_cols].add_suffix(' i5')])
 
     combined_df.reset_index(inplace=True)
 
@@ -1014,22 +1205,26 @@ def bcl_scrub_name(name):
     return re.sub(r'[^0-9a-zA-Z\-\_]+', '_', name)
 
 
+# complements the nucleotides, any other character is left as is
+_RC_TABLE = str.maketrans('ACGT', 'TGCA')
+
+
 def rc(seq):
     """
-    from http://stackoverflow.com/a/25189185/7146785
+    Reverse complement a sequence with a single table lookup per base
     """
-    complement = {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'}
-
-    rev_seq = "".join(complement.get(base, base) for base in reversed(seq))
-
-    return rev_seq
+    return seq.translate(_RC_TABLE)[::-1]
 
 
 def sequencer_i5_index(sequencer, indices):
 
     if sequencer in REVCOMP_SEQUENCERS:
         print('%s: i5 barcodes are output as reverse compliments' % sequencer)
-        return [rc(x) for x in indices]
+        if len(indices) == 0:
+            return []
+        # complement all the barcodes in one pass, reversing the joined
+        # string also reverses their order so flip the list back
+        return rc('\n'.join(indices)).split('\n')[::-1]
     elif sequencer in OTHER_SEQUENCERS:
         print('%s: i5 barcodes are output in standard direction' % sequencer)
         return indices
@@ -1081,14 +1276,14 @@ def reformat_interleaved_to_columns(wells):
         # row = ROW - roffset + floor(COL / 12)
 
         roffset = row % 2
-        nrow = int(row - roffset + np.floor(col / 12))
+        nrow = row - roffset + col // 12
 
         # COLS
         # coffset = COL % 2 + (ROW % 2) * 2
         # col = coffset * 6 + (col / 2) % 6
 
         coffset = col % 2 + (row % 2) * 2
-        ncol = int(coffset * 6 + (col / 2) % 6)
+        ncol = coffset * 6 + (col // 2) % 6
 
         nwell = '%s%s' % (chr(nrow + 65), ncol + 1)
 
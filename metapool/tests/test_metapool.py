@@ -1,9 +1,11 @@
-from unittest import TestCase, main
+from unittest import TestCase, main, skipUnless
 import pandas as pd
 import numpy as np
 import numpy.testing as npt
 import os
+import random
 from io import StringIO
+from types import MappingProxyType
 from metapool.metapool import (read_plate_map_csv, read_pico_csv,
                                calculate_norm_vol, format_dna_norm_picklist,
                                format_index_picklist,
@@ -17,29 +19,169 @@ from metapool.metapool import (read_plate_map_csv, read_pico_csv,
                                add_dna_conc, compute_pico_concentration,
                                bcl_scrub_name, rc, sequencer_i5_index,
                                reformat_interleaved_to_columns,
-                               extract_stats_metadata, sum_lanes)
+                               extract_stats_metadata, sum_lanes,
+                               _plate_labels, _well_names,
+                               _pack_destination_wells)
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PICO_SPECTRAMAX_FP = os.path.join(DATA_DIR, 'pico_spectramax.txt')
+
+ECHO_POOL_HEADER = ('Source Plate Name,Source Plate Type,Source Well,'
+                    'Concentration,Transfer Volume,Destination Plate Name,'
+                    'Destination Well\n')
+
+EXP_ECHO_POOL_PICKLIST = (ECHO_POOL_HEADER +
+                          '1,384LDV_AQ_B2_HT,A1,,10.00,NormalizedDNA,A1\n'
+                          '1,384LDV_AQ_B2_HT,A2,,10.00,NormalizedDNA,A1\n'
+                          '1,384LDV_AQ_B2_HT,A3,,5.00,NormalizedDNA,A1\n'
+                          '1,384LDV_AQ_B2_HT,A4,,5.00,NormalizedDNA,A2\n'
+                          '1,384LDV_AQ_B2_HT,A5,,10.00,NormalizedDNA,A2\n'
+                          '1,384LDV_AQ_B2_HT,A6,,10.00,NormalizedDNA,A2')
+
+# the NaN well is pooled with a volume of 0
+EXP_ECHO_POOL_PICKLIST_NAN = (ECHO_POOL_HEADER +
+                              '1,384LDV_AQ_B2_HT,A1,,10.00,NormalizedDNA,A1\n'
+                              '1,384LDV_AQ_B2_HT,A2,,10.00,NormalizedDNA,A1\n'
+                              '1,384LDV_AQ_B2_HT,A3,,0.00,NormalizedDNA,A1\n'
+                              '1,384LDV_AQ_B2_HT,A4,,5.00,NormalizedDNA,A1\n'
+                              '1,384LDV_AQ_B2_HT,A5,,10.00,NormalizedDNA,A2\n'
+                              '1,384LDV_AQ_B2_HT,A6,,10.00,NormalizedDNA,A2')
+
+CP_VALS = np.array([[10.14, 7.89, 7.9, 15.48],
+                    [7.86, 8.07, 8.16, 9.64],
+                    [12.29, 7.64, 7.32, 13.74]], dtype=np.float64)
+
+DNA_VALS = np.array([[10.14, 7.89, 7.9, 15.48],
+                     [7.86, 8.07, 8.16, 9.64],
+                     [12.29, 7.64, 7.32, 13.74]], dtype=np.float64)
+
+# qPCR standard curve (slope -3.231, intercept 12.059) at a 1:25000 dilution,
+# reported in nM
+QPCR_CONC = 10 ** ((CP_VALS - 12.059) / -3.231) * 25
+
+# ng/uL of 400 bp fragments at 660 g/mol per bp, reported in nM
+PICO_CONC = DNA_VALS / (660 * 400) * 10**6
+
+# DNA concentrations and the volumes that normalize them, the input to the
+# normalization picklist tests
+NORM_DNA_CONCS = np.array([[2, 7.89],
+                           [np.nan, .0]], dtype=np.float64)
+NORM_DNA_VOLS = np.array([[2500., 632.5],
+                          [3500., 3500.]], dtype=np.float64)
+
+# wells of a 384 well plate condensed from four interleaved 96 well plates,
+# and the same wells packed into contiguous columns
+WELLS_INTERLEAVED = np.array(['A1', 'A23', 'C1', 'C23',
+                              'A2', 'A24', 'C2', 'C24',
+                              'B1', 'B23', 'D1', 'D23',
+                              'B2', 'B24', 'D2', 'D24'], dtype='U3')
+WELLS_COLUMNAR = np.array(['A1', 'B6', 'C1', 'D6',
+                           'A7', 'B12', 'C7', 'D12',
+                           'A13', 'B18', 'C13', 'D18',
+                           'A19', 'B24', 'C19', 'D24'], dtype='U3')
+
+# the fixtures are shared by all tests, copy them before modifying
+for _values in (CP_VALS, DNA_VALS, QPCR_CONC, PICO_CONC, NORM_DNA_CONCS,
+                NORM_DNA_VOLS, WELLS_INTERLEAVED, WELLS_COLUMNAR):
+    _values.flags.writeable = False
+del _values
+
+# qPCR, DNA and index picklist values of two samples merged by combine_dfs,
+# the input to add_dna_conc
+COMBINED_DF = pd.DataFrame({
+    'Well': ['A1', 'C1'],
+    'Cp': [20.55, 9.15],
+    'DNA Concentration': [12.751753, 17.582063],
+    'DNA Transfer Volume': [80.0, 57.5],
+    'Sample Name': ['8_29_13_rk_rh', '8_29_13_rk_lh'],
+    'Plate': ['ABTX_35', 'ABTX_35'],
+    'Counter': [1841.0, 1842.0],
+    'Source Well i7': ['A23', 'B23'],
+    'Index i7': ['CGCTTAAC', 'CACCACTA'],
+    'Primer i7': ['iTru7_110_05', 'iTru7_110_06'],
+    'Source Well i5': ['G1', 'H1'],
+    'Index i5': ['GTTCCATG', 'TAGCTGAG'],
+    'Primer i5': ['iTru5_01_G', 'iTru5_01_H']})
+
+# demultiplexing stats files and the lanes summed for each, with the expected
+# lane metadata and the first and last rows of the per-sample and unknown
+# barcode frames
+_demux_stats_cases = (
+    ('notebooks/test_data/Demux/Stats.json', [5],
+     {'Flowcell': 'HLHWHBBXX',
+      'RunNumber': 458,
+      'RunId': '171006_K00180_0458_AHLHWHBBXX_RKL003_FinRisk_17_48'},
+     ({'Mismatch0': 137276,
+       'Mismatch1': 6458,
+       'NumberReads': 143734,
+       'YieldR1': 21703834,
+       'YieldQ30R1': 19772948,
+       'YieldR2': 21703834,
+       'YieldQ30R2': 17555284,
+       'Yield': 43407668},
+      {'Mismatch0': 894502,
+       'Mismatch1': 42048,
+       'NumberReads': 936550,
+       'YieldR1': 141419050,
+       'YieldQ30R1': 126289116,
+       'YieldR2': 141419050,
+       'YieldQ30R2': 116636541,
+       'Yield': 282838100}),
+     ({'Value': 67880}, {'Value': 2440})),
+    ('notebooks/test_data/Demux/OverlapSeqStats.json', [5, 1],
+     {'Flowcell': 'HXXXXXXXX',
+      'RunNumber': 999,
+      'RunId': '171111_K99999_0999_BXXXXXXXXX_XX999_KL_Sample'},
+     ({'Mismatch0': 6917044,
+       'Mismatch1': 452990,
+       'NumberReads': 7376278,
+       'YieldR1': 1106441700,
+       'YieldQ30R1': 875757969,
+       'YieldR2': 1106441700,
+       'YieldQ30R2': 676057515,
+       'Yield': 2212883400},
+      {'Mismatch0': 5075088,
+       'Mismatch1': 368852,
+       'NumberReads': 16174348,
+       'YieldR1': 2426152200,
+       'YieldQ30R1': 1913639164,
+       'YieldR2': 2426152200,
+       'YieldQ30R2': 1472852479,
+       'Yield': 4852304400}),
+     ({'Value': 5103.0}, {'Value': 6336.0})),
+)
+# like the array fixtures the expected values are shared, so freeze them
+DEMUX_STATS_CASES = tuple(
+    (fp, tuple(lanes), MappingProxyType(lane_metadata),
+     tuple(map(MappingProxyType, rows)),
+     tuple(map(MappingProxyType, unknown_rows)))
+    for fp, lanes, lane_metadata, rows, unknown_rows in _demux_stats_cases)
+del _demux_stats_cases
 
 
 class Tests(TestCase):
-    def setUp(self):
-        self.maxDiff = None
-        self.cp_vals = np.array([[10.14, 7.89, 7.9, 15.48],
-                                 [7.86, 8.07, 8.16, 9.64],
-                                 [12.29, 7.64, 7.32, 13.74]])
-
-        self.dna_vals = np.array([[10.14, 7.89, 7.9, 15.48],
-                                  [7.86, 8.07, 8.16, 9.64],
-                                  [12.29, 7.64, 7.32, 13.74]])
-
-        self.qpcr_conc = \
-            np.array([[98.14626462, 487.8121413, 484.3480866, 2.183406934],
-                      [498.3536649, 429.0839787, 402.4270321, 140.1601735],
-                      [21.20533391, 582.9456031, 732.2655041, 7.545145988]])
-
-        self.pico_conc = \
-            np.array([[38.4090909, 29.8863636, 29.9242424, 58.6363636],
-                      [29.7727273, 30.5681818, 30.9090909, 36.5151515],
-                      [46.5530303, 28.9393939, 27.7272727, 52.0454545]])
+    maxDiff = None
+
+    cp_vals = CP_VALS
+    dna_vals = DNA_VALS
+    qpcr_conc = QPCR_CONC
+    pico_conc = PICO_CONC
+
+    @classmethod
+    def setUpClass(cls):
+        # equal volume pooling of the qPCR plate, shared by the eqvol and
+        # pool estimate tests
+        cls.eqvol_sample_vols_60 = \
+            compute_shotgun_pooling_values_eqvol(cls.qpcr_conc,
+                                                 total_vol=60.0)
+        cls.eqvol_sample_vols_60.flags.writeable = False
+
+    def assertRowEqual(self, obs, exp):
+        """Compare a numeric frame row with a mapping of expected values"""
+        keys = sorted(exp)
+        self.assertListEqual(sorted(obs.index), keys)
+        npt.assert_array_equal(obs[keys].to_numpy(), [exp[k] for k in keys])
 
     # def test_compute_shotgun_normalization_values(self):
     #     input_vol = 3.5
@@ -74,12 +216,12 @@ class Tests(TestCase):
     #     npt.assert_almost_equal(obs_sample, exp_sample)
     #     npt.assert_almost_equal(obs_water, exp_water)
     def test_read_plate_map_csv(self):
-        plate_map_csv = \
-            'Sample\tRow\tCol\tBlank\tProject Name\n' + \
-            'sam1\tA\t1\tFalse\tstudy_1\n' + \
-            'sam2\tA\t2\tFalse\tstudy_1\n' + \
-            'blank1\tB\t1\tTrue\tstudy_1\n' + \
-            'sam3\tB\t2\tFalse\tstudy_1\n'
+        plate_map_csv = (
+            'Sample\tRow\tCol\tBlank\tProject Name\n'
+            'sam1\tA\t1\tFalse\tstudy_1\n'
+            'sam2\tA\t2\tFalse\tstudy_1\n'
+            'blank1\tB\t1\tTrue\tstudy_1\n'
+            'sam3\tB\t2\tFalse\tstudy_1\n')
 
         plate_map_f = StringIO(plate_map_csv)
 
@@ -87,15 +229,15 @@ class Tests(TestCase):
                                                 'sam3'],
                                      'Row': ['A', 'A', 'B', 'B'],
                                      'Col': [1, 2, 1, 2],
+                                     'Blank': [False, False, True, False],
                                      'Project Name': ['study_1', 'study_1',
                                                       'study_1', 'study_1'],
-                                     'Well': ['A1', 'A2', 'B1', 'B2'],
-                                     'Blank': [False, False, True, False]})
+                                     'Well': ['A1', 'A2', 'B1', 'B2']})
 
         obs_plate_df = read_plate_map_csv(plate_map_f)
 
         pd.testing.assert_frame_equal(
-            obs_plate_df, exp_plate_df, check_like=True)
+            obs_plate_df, exp_plate_df, check_exact=True)
 
     def test_read_plate_map_csv_remove_empty_wells(self):
         plate_map_csv = (
@@ -113,11 +255,11 @@ class Tests(TestCase):
         exp = pd.DataFrame({'Sample': ['sam1', 'sam2', 'blank1',
                                        'sam3'],
                             'Row': ['A', 'A', 'B', 'B'],
+                            'Col': [1, 2, 1, 2],
+                            'Blank': [False, False, True, False],
                             'Project Name': [
                                 'study_1', 'study_1', 'study_1', 'study_1'],
-                            'Col': [1, 2, 1, 2],
-                            'Well': ['A1', 'A2', 'B1', 'B2'],
-                            'Blank': [False, False, True, False]})
+                            'Well': ['A1', 'A2', 'B1', 'B2']})
 
         with self.assertWarnsRegex(UserWarning,
                                    'This plate map contains 4 empty wells, '
@@ -125,32 +267,34 @@ class Tests(TestCase):
             obs_plate_df = read_plate_map_csv(plate_map_f)
 
         pd.testing.assert_frame_equal(
-            obs_plate_df, exp, check_like=True)
+            obs_plate_df, exp, check_exact=True)
 
     def test_read_plate_map_csv_error_repeated_sample_names(self):
-        plate_map_csv = \
-            'Sample\tRow\tCol\tBlank\n' + \
-            'sam1\tA\t1\tFalse\n' + \
-            'sam2\tA\t2\tFalse\n' + \
-            'blank1\tB\t1\tTrue\n' + \
-            'blank1\tB\t4\tTrue\n'
+        plate_map_csv = (
+            'Sample\tRow\tCol\tBlank\n'
+            'sam1\tA\t1\tFalse\n'
+            'sam2\tA\t2\tFalse\n'
+            'blank1\tB\t1\tTrue\n'
+            'blank1\tB\t4\tTrue\n')
 
         plate_map_f = StringIO(plate_map_csv)
 
         with self.assertRaises(Exception):
             read_plate_map_csv(plate_map_f)
 
+    @skipUnless(os.getenv('METAPOOL_RUN_QIITA_TESTS'),
+                'needs a Qiita test server, set METAPOOL_RUN_QIITA_TESTS')
     def test_read_plate_map_csv_validate_qiita_sample_names(self):
         qiita_oauth2_conf_fp = os.path.join(
             os.getcwd(), 'qiita.oauth2.cfg.local')
 
         # Test error
-        plate_map_csv = \
-            'Sample\tRow\tCol\tBlank\tProject Name\n' + \
-            'sam1\tA\t1\tFalse\tstudy_1\n' + \
-            'sam2\tA\t2\tFalse\tstudy_1\n' + \
-            'BLANK1\tB\t1\tTrue\tstudy_1\n' + \
-            'sam3\tB\t2\tFalse\tstudy_1\n'
+        plate_map_csv = (
+            'Sample\tRow\tCol\tBlank\tProject Name\n'
+            'sam1\tA\t1\tFalse\tstudy_1\n'
+            'sam2\tA\t2\tFalse\tstudy_1\n'
+            'BLANK1\tB\t1\tTrue\tstudy_1\n'
+            'sam3\tB\t2\tFalse\tstudy_1\n')
         with self.assertRaisesRegex(ValueError, "study_1 has 3 missing "
                                     r"samples \(i.e. sam1, sam2, sam3\). Some "
                                     "samples from Qiita: SK"):
@@ -158,22 +302,22 @@ class Tests(TestCase):
                                qiita_oauth2_conf_fp=qiita_oauth2_conf_fp)
 
         # Test success
-        plate_map_csv = \
-            'Sample\tRow\tCol\tBlank\tProject Name\n' + \
-            'SKM640183\tA\t1\tFalse\tstudy_1\n' + \
-            'SKM7.640188\tA\t2\tFalse\tstudy_1\n' + \
-            'BLANK1\tB\t1\tTrue\tstudy_1\n' + \
-            'SKD3.640198\tB\t2\tFalse\tstudy_1\n'
+        plate_map_csv = (
+            'Sample\tRow\tCol\tBlank\tProject Name\n'
+            'SKM640183\tA\t1\tFalse\tstudy_1\n'
+            'SKM7.640188\tA\t2\tFalse\tstudy_1\n'
+            'BLANK1\tB\t1\tTrue\tstudy_1\n'
+            'SKD3.640198\tB\t2\tFalse\tstudy_1\n')
         obs = read_plate_map_csv(
             StringIO(plate_map_csv), qiita_oauth2_conf_fp=qiita_oauth2_conf_fp)
         exp = pd.DataFrame({
             'Sample': ['SKM640183', 'SKM7.640188', 'BLANK1', 'SKD3.640198'],
             'Row': ['A', 'A', 'B', 'B'],
-            'Project Name': ['study_1', 'study_1', 'study_1', 'study_1'],
             'Col': [1, 2, 1, 2],
-            'Well': ['A1', 'A2', 'B1', 'B2'],
-            'Blank': [False, False, True, False]})
-        pd.testing.assert_frame_equal(obs, exp, check_like=True)
+            'Blank': [False, False, True, False],
+            'Project Name': ['study_1', 'study_1', 'study_1', 'study_1'],
+            'Well': ['A1', 'A2', 'B1', 'B2']})
+        pd.testing.assert_frame_equal(obs, exp, check_exact=True)
 
     def test_read_pico_csv(self):
         # Test a normal sheet
@@ -199,7 +343,7 @@ class Tests(TestCase):
         obs_pico_df = read_pico_csv(pico_csv_f)
 
         pd.testing.assert_frame_equal(
-            obs_pico_df, exp_pico_df, check_like=True)
+            obs_pico_df, exp_pico_df)
 
         # Test a sheet that has some ???? zero values
         pico_csv = '''Results
@@ -224,80 +368,52 @@ class Tests(TestCase):
         obs_pico_df = read_pico_csv(pico_csv_f)
 
         pd.testing.assert_frame_equal(
-            obs_pico_df, exp_pico_df, check_like=True)
+            obs_pico_df, exp_pico_df)
 
     def test_read_pico_csv_spectramax(self):
         # Test a normal sheet
-        fp_spectramax = os.path.join(os.path.dirname(__file__), 'data',
-                                     'pico_spectramax.txt')
-
-        obs_pico_df = read_pico_csv(fp_spectramax,
+        obs_pico_df = read_pico_csv(PICO_SPECTRAMAX_FP,
                                     plate_reader='SpectraMax_i3x')
         self.assertEqual(obs_pico_df.shape[0], 384)
         self.assertEqual(list(obs_pico_df.columns),
                          ['Well', 'Sample DNA Concentration'])
         # Test Invalid plate_reader error
         with self.assertRaises(ValueError):
-            read_pico_csv(fp_spectramax, plate_reader='foo')
+            read_pico_csv(PICO_SPECTRAMAX_FP, plate_reader='foo')
 
     def test_read_pico_csv_spectramax_negfix(self):
         # Tests that Concentration values are clipped
         # to a range of (0,60), eliminating possible
         # negative concentration values.
-        fp_spectramax = os.path.join(os.path.dirname(__file__), 'data',
-                                     'pico_spectramax.txt')
 
-        obs_pico_df = read_pico_csv(fp_spectramax,
-                                    plate_reader='SpectraMax_i3x')
-        self.assertEqual(all(obs_pico_df['Sample DNA Concentration'] >= 0),
-                         True)
+        # read the file once and parse it twice from memory, decoding the
+        # whole file at once instead of through a text wrapper
+        with open(PICO_SPECTRAMAX_FP, 'rb') as f:
+            spectramax = f.read().decode('utf-16')
 
-        check_for_neg = pd.read_csv(open(fp_spectramax, encoding='utf-16'),
-                                    sep='\t', skiprows=2, skipfooter=15,
-                                    engine='python')
+        obs_pico_df = read_pico_csv(StringIO(spectramax),
+                                    plate_reader='SpectraMax_i3x')
+        self.assertTrue(
+            (obs_pico_df['Sample DNA Concentration'].to_numpy() >= 0).all())
 
-        conc_col_name = 'Sample DNA Concentration'
-        check_for_neg.rename(columns={'Concentration': conc_col_name,
-                                      'Wells': 'Well'}, inplace=True)
+        # the C parser has no skipfooter, so read as many rows as are left
+        # after the two preamble lines, the header and the 15 footer lines
+        n_rows = len(spectramax.splitlines()) - 2 - 1 - 15
+        check_for_neg = pd.read_csv(StringIO(spectramax), sep='\t',
+                                    skiprows=2, nrows=n_rows, engine='c',
+                                    usecols=['Concentration'],
+                                    dtype={'Concentration': np.float64})
+        self.assertEqual(len(check_for_neg), 384)
 
-        self.assertEqual(any(check_for_neg[conc_col_name] < 0), True)
+        self.assertTrue((check_for_neg['Concentration'].to_numpy() < 0).any())
 
     def test_calculate_norm_vol(self):
-        dna_concs = np.array([[2, 7.89],
-                              [np.nan, .0]])
-
-        exp_vols = np.array([[2500., 632.5],
-                             [3500., 3500.]])
+        obs_vols = calculate_norm_vol(NORM_DNA_CONCS)
 
-        obs_vols = calculate_norm_vol(dna_concs)
-
-        np.testing.assert_allclose(exp_vols, obs_vols)
+        np.testing.assert_allclose(NORM_DNA_VOLS, obs_vols)
 
     def test_format_dna_norm_picklist(self):
-
-        exp_picklist = (
-            'Sample\tSource Plate Name\tSource Plate Type\tSource Well\t'
-            'Concentration\tTransfer Volume\tDestination Plate Name\t'
-            'Destination Well\n'
-            'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\tNormalizedDNA\t'
-            'A1\n'
-            'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\tNormalizedDNA\t'
-            'A2\n'
-            'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\tNormalizedDNA\t'
-            'B1\n'
-            'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\tNormalizedDNA\t'
-            'B2\n'
-            'sam1\tSample\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\tNormalizedDNA\t'
-            'A1\n'
-            'sam2\tSample\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\tNormalizedDNA\t'
-            'A2\n'
-            'blank1\tSample\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\t'
-            'NormalizedDNA\tB1\n'
-            'sam3\tSample\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\tNormalizedDNA\t'
-            'B2')
-
-        dna_vols = np.array([[2500., 632.5],
-                             [3500., 3500.]])
+        dna_vols = NORM_DNA_VOLS
 
         water_vols = 3500 - dna_vols
 
@@ -307,104 +423,78 @@ class Tests(TestCase):
         sample_names = np.array([['sam1', 'sam2'],
                                  ['blank1', 'sam3']])
 
-        dna_concs = np.array([[2, 7.89],
-                              [np.nan, .0]])
+        dna_concs = NORM_DNA_CONCS
 
-        obs_picklist = format_dna_norm_picklist(dna_vols, water_vols, wells,
-                                                sample_names=sample_names,
-                                                dna_concs=dna_concs)
-
-        self.assertEqual(exp_picklist, obs_picklist)
-
-        # test if switching dest wells
-        exp_picklist = (
+        header = (
             'Sample\tSource Plate Name\tSource Plate Type\tSource Well\t'
             'Concentration\tTransfer Volume\tDestination Plate Name\t'
-            'Destination Well\n'
-            'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\tNormalizedDNA\t'
-            'D1\n'
-            'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\tNormalizedDNA\t'
-            'D2\n'
-            'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\tNormalizedDNA\t'
-            'E1\n'
-            'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\tNormalizedDNA\t'
-            'E2\n'
-            'sam1\tSample\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\tNormalizedDNA\t'
-            'D1\n'
-            'sam2\tSample\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\tNormalizedDNA\t'
-            'D2\n'
-            'blank1\tSample\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\tNormalizedDNA\t'
-            'E1\n'
-            'sam3\tSample\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\tNormalizedDNA\t'
-            'E2')
-
-        dna_vols = np.array([[2500., 632.5],
-                             [3500., 3500.]])
-
-        water_vols = 3500 - dna_vols
-
-        wells = np.array([['A1', 'A2'],
-                          ['B1', 'B2']])
-        dest_wells = np.array([['D1', 'D2'],
-                               ['E1', 'E2']])
-        sample_names = np.array([['sam1', 'sam2'],
-                                 ['blank1', 'sam3']])
-
-        dna_concs = np.array([[2, 7.89],
-                              [np.nan, .0]])
-
-        obs_picklist = format_dna_norm_picklist(dna_vols, water_vols, wells,
-                                                dest_wells=dest_wells,
-                                                sample_names=sample_names,
-                                                dna_concs=dna_concs)
-
-        self.assertEqual(exp_picklist, obs_picklist)
-
-        # test if switching source plates
-        exp_picklist = (
-            'Sample\tSource Plate Name\tSource Plate Type\tSource Well\t'
-            'Concentration\tTransfer Volume\tDestination Plate Name\t'
-            'Destination Well\n'
-            'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\tNormalizedDNA\t'
-            'A1\n'
-            'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\tNormalizedDNA\t'
-            'A2\n'
-            'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\tNormalizedDNA\t'
-            'B1\n'
-            'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\tNormalizedDNA\t'
-            'B2\n'
-            'sam1\tSample_Plate1\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\t'
-            'NormalizedDNA\tA1\n'
-            'sam2\tSample_Plate1\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\t'
-            'NormalizedDNA\tA2\n'
-            'blank1\tSample_Plate2\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\t'
-            'NormalizedDNA\tB1\n'
-            'sam3\tSample_Plate2\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\t'
-            'NormalizedDNA\tB2')
-
-        dna_vols = np.array([[2500., 632.5],
-                             [3500., 3500.]])
-
-        water_vols = 3500 - dna_vols
-
-        wells = np.array([['A1', 'A2'],
-                          ['B1', 'B2']])
-
-        sample_names = np.array([['sam1', 'sam2'],
-                                 ['blank1', 'sam3']])
-
-        sample_plates = np.array([['Sample_Plate1', 'Sample_Plate1'],
-                                  ['Sample_Plate2', 'Sample_Plate2']])
-
-        dna_concs = np.array([[2, 7.89],
-                              [np.nan, .0]])
-
-        obs_picklist = format_dna_norm_picklist(dna_vols, water_vols, wells,
-                                                sample_names=sample_names,
-                                                sample_plates=sample_plates,
-                                                dna_concs=dna_concs)
-
-        self.assertEqual(exp_picklist, obs_picklist)
+            'Destination Well\n')
+
+        cases = {
+            'default': ({}, (
+                'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\t'
+                'NormalizedDNA\tA1\n'
+                'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\t'
+                'NormalizedDNA\tA2\n'
+                'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\t'
+                'NormalizedDNA\tB1\n'
+                'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\t'
+                'NormalizedDNA\tB2\n'
+                'sam1\tSample\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\t'
+                'NormalizedDNA\tA1\n'
+                'sam2\tSample\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\t'
+                'NormalizedDNA\tA2\n'
+                'blank1\tSample\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\t'
+                'NormalizedDNA\tB1\n'
+                'sam3\tSample\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\t'
+                'NormalizedDNA\tB2')),
+            # test if switching dest wells
+            'dest_wells': ({'dest_wells': np.array([['D1', 'D2'],
+                                                   ['E1', 'E2']])}, (
+                'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\t'
+                'NormalizedDNA\tD1\n'
+                'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\t'
+                'NormalizedDNA\tD2\n'
+                'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\t'
+                'NormalizedDNA\tE1\n'
+                'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\t'
+                'NormalizedDNA\tE2\n'
+                'sam1\tSample\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\t'
+                'NormalizedDNA\tD1\n'
+                'sam2\tSample\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\t'
+                'NormalizedDNA\tD2\n'
+                'blank1\tSample\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\t'
+                'NormalizedDNA\tE1\n'
+                'sam3\tSample\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\t'
+                'NormalizedDNA\tE2')),
+            # test if switching source plates
+            'sample_plates': ({'sample_plates': np.array(
+                [['Sample_Plate1', 'Sample_Plate1'],
+                 ['Sample_Plate2', 'Sample_Plate2']])}, (
+                'sam1\tWater\t384PP_AQ_BP2_HT\tA1\t2.0\t1000.0\t'
+                'NormalizedDNA\tA1\n'
+                'sam2\tWater\t384PP_AQ_BP2_HT\tA2\t7.89\t2867.5\t'
+                'NormalizedDNA\tA2\n'
+                'blank1\tWater\t384PP_AQ_BP2_HT\tB1\tnan\t0.0\t'
+                'NormalizedDNA\tB1\n'
+                'sam3\tWater\t384PP_AQ_BP2_HT\tB2\t0.0\t0.0\t'
+                'NormalizedDNA\tB2\n'
+                'sam1\tSample_Plate1\t384PP_AQ_BP2_HT\tA1\t2.0\t2500.0\t'
+                'NormalizedDNA\tA1\n'
+                'sam2\tSample_Plate1\t384PP_AQ_BP2_HT\tA2\t7.89\t632.5\t'
+                'NormalizedDNA\tA2\n'
+                'blank1\tSample_Plate2\t384PP_AQ_BP2_HT\tB1\tnan\t3500.0\t'
+                'NormalizedDNA\tB1\n'
+                'sam3\tSample_Plate2\t384PP_AQ_BP2_HT\tB2\t0.0\t3500.0\t'
+                'NormalizedDNA\tB2'))}
+
+        for case, (kwargs, exp_rows) in cases.items():
+            with self.subTest(case=case):
+                obs_picklist = format_dna_norm_picklist(
+                    dna_vols, water_vols, wells, sample_names=sample_names,
+                    dna_concs=dna_concs, **kwargs)
+
+                self.assertEqual(header + exp_rows, obs_picklist)
 
     def test_format_index_picklist(self):
         exp_picklist = (
@@ -433,35 +523,22 @@ class Tests(TestCase):
 
         sample_names = np.array(['sam1', 'sam2', 'blank1', 'sam3'])
 
-        indices = pd.DataFrame({'i5 name': {0: 'iTru5_01_A',
-                                            1: 'iTru5_01_B',
-                                            2: 'iTru5_01_C',
-                                            3: 'iTru5_01_D'},
-                                'i5 plate': {0: 'iTru5_plate',
-                                             1: 'iTru5_plate',
-                                             2: 'iTru5_plate',
-                                             3: 'iTru5_plate'},
-                                'i5 sequence': {0: 'ACCGACAA', 1: 'AGTGGCAA',
-                                                2: 'CACAGACT', 3: 'CGACACTT'},
-                                'i5 well': {0: 'A1', 1: 'B1', 2: 'C1',
-                                            3: 'D1'},
-                                'i7 name': {0: 'iTru7_101_01',
-                                            1: 'iTru7_101_02',
-                                            2: 'iTru7_101_03',
-                                            3: 'iTru7_101_04'},
-                                'i7 plate': {0: 'iTru7_plate',
-                                             1: 'iTru7_plate',
-                                             2: 'iTru7_plate',
-                                             3: 'iTru7_plate'},
-                                'i7 sequence': {0: 'ACGTTACC', 1: 'CTGTGTTG',
-                                                2: 'TGAGGTGT', 3: 'GATCCATG'},
-                                'i7 well': {0: 'A1', 1: 'A2', 2: 'A3',
-                                            3: 'A4'},
-                                'index combo': {0: 0, 1: 1, 2: 2, 3: 3},
-                                'index combo seq': {0: 'ACCGACAAACGTTACC',
-                                                    1: 'AGTGGCAACTGTGTTG',
-                                                    2: 'CACAGACTTGAGGTGT',
-                                                    3: 'CGACACTTGATCCATG'}})
+        indices = pd.DataFrame(
+            columns=['i5 name', 'i5 plate', 'i5 sequence', 'i5 well',
+                     'i7 name', 'i7 plate', 'i7 sequence', 'i7 well',
+                     'index combo', 'index combo seq'],
+            data=[['iTru5_01_A', 'iTru5_plate', 'ACCGACAA', 'A1',
+                   'iTru7_101_01', 'iTru7_plate', 'ACGTTACC', 'A1',
+                   0, 'ACCGACAAACGTTACC'],
+                  ['iTru5_01_B', 'iTru5_plate', 'AGTGGCAA', 'B1',
+                   'iTru7_101_02', 'iTru7_plate', 'CTGTGTTG', 'A2',
+                   1, 'AGTGGCAACTGTGTTG'],
+                  ['iTru5_01_C', 'iTru5_plate', 'CACAGACT', 'C1',
+                   'iTru7_101_03', 'iTru7_plate', 'TGAGGTGT', 'A3',
+                   2, 'CACAGACTTGAGGTGT'],
+                  ['iTru5_01_D', 'iTru5_plate', 'CGACACTT', 'D1',
+                   'iTru7_101_04', 'iTru7_plate', 'GATCCATG', 'A4',
+                   3, 'CGACACTTGATCCATG']])
 
         obs_picklist = format_index_picklist(
             sample_names, sample_wells, indices)
@@ -473,13 +550,29 @@ class Tests(TestCase):
         exp = self.qpcr_conc
 
         npt.assert_allclose(obs, exp)
+        npt.assert_allclose(obs[0], [98.14626462, 487.8121413, 484.3480866,
+                                     2.183406934])
+
+    def test_compute_qpcr_pooling_float32(self):
+        obs_conc = compute_qpcr_concentration(self.cp_vals, dtype=np.float32)
+        self.assertEqual(obs_conc.dtype, np.float32)
+        npt.assert_allclose(obs_conc, self.qpcr_conc, rtol=1e-5)
+
+        obs_vols = compute_shotgun_pooling_values_qpcr(obs_conc,
+                                                       dtype=np.float32)
+        exp_vols = compute_shotgun_pooling_values_qpcr(self.qpcr_conc)
+        self.assertEqual(obs_vols.dtype, np.float32)
+        npt.assert_allclose(obs_vols, exp_vols, rtol=1e-5)
+
+        obs_pool = estimate_pool_conc_vol(obs_vols, obs_conc)
+        exp_pool = estimate_pool_conc_vol(exp_vols, self.qpcr_conc)
+        self.assertIsInstance(obs_pool[1], np.float64)
+        npt.assert_allclose(obs_pool, exp_pool, rtol=1e-5)
 
     def test_compute_shotgun_pooling_values_eqvol(self):
-        obs_sample_vols = \
-            compute_shotgun_pooling_values_eqvol(self.qpcr_conc,
-                                                 total_vol=60.0)
+        obs_sample_vols = self.eqvol_sample_vols_60
 
-        exp_sample_vols = np.zeros([3, 4]) + 60.0/12*1000
+        exp_sample_vols = np.full([3, 4], 60.0/12*1000)
 
         npt.assert_allclose(obs_sample_vols, exp_sample_vols)
 
@@ -488,109 +581,248 @@ class Tests(TestCase):
             compute_shotgun_pooling_values_eqvol(self.qpcr_conc,
                                                  total_vol=60)
 
-        exp_sample_vols = np.zeros([3, 4]) + 60.0/12*1000
+        exp_sample_vols = np.full([3, 4], 60.0/12*1000)
 
         npt.assert_allclose(obs_sample_vols, exp_sample_vols)
 
     def test_compute_shotgun_pooling_values_qpcr(self):
         sample_concs = np.array([[1, 12, 400],
-                                 [200, 40, 1]])
+                                 [200, 40, 1]], dtype=np.int64)
 
         exp_vols = np.array([[0, 50000, 6250],
-                             [12500, 50000, 0]])
+                             [12500, 50000, 0]], dtype=np.float64)
 
         obs_vols = compute_shotgun_pooling_values_qpcr(sample_concs)
 
         npt.assert_allclose(exp_vols, obs_vols)
 
+    def test_compute_shotgun_pooling_values_qpcr_out(self):
+        sample_concs = np.array([[1, 12, 400],
+                                 [200, 40, 1]], dtype=np.int64)
+
+        exp_vols = np.array([[0, 50000, 6250],
+                             [12500, 50000, 0]], dtype=np.float64)
+
+        out = np.full(sample_concs.shape, np.nan)
+        obs_vols = compute_shotgun_pooling_values_qpcr(sample_concs, out=out)
+
+        self.assertIs(obs_vols, out)
+        npt.assert_allclose(exp_vols, out)
+
+        # the concentrations can be overwritten with their own volumes
+        concs = sample_concs.astype(np.float64)
+        obs_vols = compute_shotgun_pooling_values_qpcr(concs, out=concs)
+
+        self.assertIs(obs_vols, concs)
+        npt.assert_allclose(exp_vols, concs)
+
+        with self.assertRaisesRegex(ValueError, 'same shape'):
+            compute_shotgun_pooling_values_qpcr(sample_concs,
+                                                out=np.empty((3, 2)))
+
     def test_compute_shotgun_pooling_values_qpcr_minvol(self):
         sample_concs = np.array([[1, 12, 400],
-                                 [200, 40, 1]])
+                                 [200, 40, 1]], dtype=np.int64)
 
         exp_vols = np.array([[100, 100, 4166.6666666666],
-                             [8333.33333333333, 41666.666666666, 100]])
+                             [8333.33333333333, 41666.666666666, 100]],
+                            dtype=np.float64)
 
         obs_vols = compute_shotgun_pooling_values_qpcr_minvol(sample_concs)
 
         npt.assert_allclose(exp_vols, obs_vols)
 
     def test_estimate_pool_conc_vol(self):
-        obs_sample_vols = compute_shotgun_pooling_values_eqvol(
-            self.qpcr_conc, total_vol=60.0)
-
         obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
-            obs_sample_vols, self.qpcr_conc)
+            self.eqvol_sample_vols_60, self.qpcr_conc)
 
         exp_pool_conc = 323.873027979
         exp_pool_vol = 60000.0
 
-        npt.assert_almost_equal(obs_pool_conc, exp_pool_conc)
-        npt.assert_almost_equal(obs_pool_vol, exp_pool_vol)
+        npt.assert_allclose(obs_pool_conc, exp_pool_conc)
+        npt.assert_allclose(obs_pool_vol, exp_pool_vol)
 
-    def test_format_pooling_echo_pick_list(self):
-        vol_sample = np.array([[10.00, 10.00, 5.00, 5.00, 10.00, 10.00]])
+    def test_estimate_pool_conc_vol_nan(self):
+        sample_vols = np.array([[100., np.nan],
+                                [300., 200.]], dtype=np.float64)
+        sample_concs = np.array([[10., 20.],
+                                 [30., np.nan]], dtype=np.float64)
+
+        # a missing well in an array shows up in the results
+        obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
+            sample_vols, sample_concs)
+
+        self.assertTrue(np.isnan(obs_pool_conc))
+        self.assertTrue(np.isnan(obs_pool_vol))
+
+        # pandas inputs skip missing values
+        obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
+            pd.Series(sample_vols.ravel()), pd.Series(sample_concs.ravel()))
+
+        npt.assert_allclose(obs_pool_conc, 10000 / 600)
+        npt.assert_allclose(obs_pool_vol, 600.0)
+
+        # infinite values are not treated as missing
+        sample_vols[0, 1] = 0.
+        sample_concs[1, 1] = np.inf
+        obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
+            sample_vols, sample_concs)
+
+        self.assertEqual(obs_pool_conc, np.inf)
+        npt.assert_allclose(obs_pool_vol, 600.0)
+
+    def test_estimate_pool_conc_vol_series(self):
+        # Series are paired by well label, not by position
+        sample_vols = pd.Series([100., 300., 200.], index=['A1', 'B1', 'C1'])
+        sample_concs = pd.Series([30., 20., 10.], index=['B1', 'C1', 'A1'])
+
+        obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
+            sample_vols, sample_concs)
+
+        npt.assert_allclose(obs_pool_conc, (1000 + 9000 + 4000) / 600)
+        npt.assert_allclose(obs_pool_vol, 600.0)
 
-        header = ['Source Plate Name,Source Plate Type,Source Well,'
-                  'Concentration,Transfer Volume,Destination Plate Name,'
-                  'Destination Well']
+        # wells without a concentration add their volume but no pmols
+        obs_pool_conc, obs_pool_vol = estimate_pool_conc_vol(
+            sample_vols, sample_concs.drop('C1'))
 
-        exp_values = ['1,384LDV_AQ_B2_HT,A1,,10.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A2,,10.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A3,,5.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A4,,5.00,NormalizedDNA,A2',
-                      '1,384LDV_AQ_B2_HT,A5,,10.00,NormalizedDNA,A2',
-                      '1,384LDV_AQ_B2_HT,A6,,10.00,NormalizedDNA,A2']
+        npt.assert_allclose(obs_pool_conc, (1000 + 9000) / 600)
+        npt.assert_allclose(obs_pool_vol, 600.0)
 
-        exp_str = '\n'.join(header + exp_values)
+    def test_format_pooling_echo_pick_list(self):
+        vol_sample = np.array([[10.00, 10.00, 5.00, 5.00, 10.00, 10.00]],
+                              dtype=np.float64)
 
         obs_str = format_pooling_echo_pick_list(vol_sample,
                                                 max_vol_per_well=26,
                                                 dest_plate_shape=[16, 24])
-        self.maxDiff = None
-        self.assertEqual(exp_str, obs_str)
-
-    def test_format_pooling_echo_pick_list_nan(self):
-        vol_sample = np.array([[10.00, 10.00, np.nan, 5.00, 10.00, 10.00]])
 
-        header = ['Source Plate Name,Source Plate Type,Source Well,'
-                  'Concentration,Transfer Volume,Destination Plate Name,'
-                  'Destination Well']
+        self.assertEqual(EXP_ECHO_POOL_PICKLIST, obs_str)
 
-        exp_values = ['1,384LDV_AQ_B2_HT,A1,,10.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A2,,10.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A3,,0.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A4,,5.00,NormalizedDNA,A1',
-                      '1,384LDV_AQ_B2_HT,A5,,10.00,NormalizedDNA,A2',
-                      '1,384LDV_AQ_B2_HT,A6,,10.00,NormalizedDNA,A2']
-
-        exp_str = '\n'.join(header + exp_values)
+    def test_format_pooling_echo_pick_list_nan(self):
+        vol_sample = np.array([[10.00, 10.00, np.nan, 5.00, 10.00, 10.00]],
+                              dtype=np.float64)
 
         obs_str = format_pooling_echo_pick_list(vol_sample,
                                                 max_vol_per_well=26,
                                                 dest_plate_shape=[16, 24])
-        self.maxDiff = None
-        self.assertEqual(exp_str, obs_str)
+
+        self.assertEqual(EXP_ECHO_POOL_PICKLIST_NAN, obs_str)
+
+    def test_format_pooling_echo_pick_list_random(self):
+        # the pick list has to match the original well by well formatting
+        # byte for byte
+        def exp_pick_list(vols, max_vol, dest_shape):
+            contents = [ECHO_POOL_HEADER[:-1]]
+            running_tot = 0
+            d = 1
+            for i, row in enumerate(np.nan_to_num(vols)):
+                for j, vol in enumerate(row):
+                    if running_tot + vol > max_vol:
+                        d += 1
+                        running_tot = vol
+                    else:
+                        running_tot += vol
+                    dest = '%s%d' % (chr(ord('A') + d // dest_shape[0]),
+                                     d % dest_shape[1])
+                    well = '%s%d' % (chr(ord('A') + i), j + 1)
+                    contents.append(','.join(
+                        ['1', '384LDV_AQ_B2_HT', well, '', '%.2f' % vol,
+                         'NormalizedDNA', dest]))
+            return '\n'.join(contents)
+
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            shape = tuple(rng.integers(1, [17, 25]))
+            vols = rng.uniform(0, 2000, shape)
+            vols[rng.random(shape) < .1] = np.nan
+            max_vol = rng.choice([500, 3000, 60000])
+            dest_shape = [[8, 12], [16, 24]][rng.integers(2)]
+
+            with self.subTest(shape=shape, max_vol=max_vol):
+                obs = format_pooling_echo_pick_list(
+                    vols, max_vol_per_well=max_vol,
+                    dest_plate_shape=dest_shape)
+                self.assertEqual(
+                    obs, exp_pick_list(vols, max_vol, dest_shape))
+
+    def test_well_names(self):
+        obs = _well_names(2, 3)
+        np.testing.assert_array_equal(obs, ['A1', 'A2', 'A3',
+                                            'B1', 'B2', 'B3'])
+
+        # cached arrays are shared, so they can't be modified in place
+        self.assertIs(obs, _well_names(2, 3))
+        self.assertFalse(obs.flags.writeable)
+
+        obs_rows, obs_cols = _plate_labels(16, 24)
+        self.assertEqual(obs_rows[-1], 'P')
+        self.assertEqual(obs_cols[-1], '24')
+
+    def test_pack_destination_wells(self):
+        # a destination overflows on the first well above the limit, and an
+        # oversized well still gets a destination of its own
+        vols = np.array([70, 20, 20, 150, 0, 50, 50], dtype=np.float64)
+        obs = _pack_destination_wells(vols, 100)
+        np.testing.assert_array_equal(obs, [1, 1, 2, 3, 4, 4, 4])
+
+        obs = _pack_destination_wells(np.array([150, 10], dtype=np.float64),
+                                      100)
+        np.testing.assert_array_equal(obs, [2, 3])
 
     def test_make_2D_array(self):
         example_qpcr_df = pd.DataFrame({'Cp': [12, 0, 5, np.nan],
                                         'Pos': ['A1', 'A2', 'A3', 'A4']})
 
-        exp_cp_array = np.array([[12.0, 0.0, 5.0, np.nan]])
+        exp_cp_array = np.array([[12.0, 0.0, 5.0, np.nan]], dtype=np.float64)
 
         np.testing.assert_allclose(make_2D_array(
-            example_qpcr_df, rows=1, cols=4).astype(float), exp_cp_array)
+            example_qpcr_df, rows=1, cols=4), exp_cp_array)
 
         example2_qpcr_df = pd.DataFrame({'Cp': [12, 0, 1, np.nan,
                                                 12, 0, 5, np.nan],
                                          'Pos': ['A1', 'A2', 'A3', 'A4',
                                                  'B1', 'B2', 'B3', 'B4']})
         exp2_cp_array = np.array([[12.0, 0.0, 1.0, np.nan],
-                                  [12.0, 0.0, 5.0, np.nan]])
+                                  [12.0, 0.0, 5.0, np.nan]],
+                                 dtype=np.float64)
 
         np.testing.assert_allclose(make_2D_array(
-            example2_qpcr_df, rows=2, cols=4).astype(float), exp2_cp_array)
+            example2_qpcr_df, rows=2, cols=4), exp2_cp_array)
+
+    def test_make_2D_array_dtypes(self):
+        example_df = pd.DataFrame({'Cp': [12, 0, 5],
+                                   'Sample': ['sam1', 'sam2', 'sam3'],
+                                   'Pos': ['A1', 'a2', 'B1']})
 
-    def combine_dfs(self):
+        obs = make_2D_array(example_df, rows=2, cols=2)
+        self.assertEqual(obs.dtype, np.float64)
+        np.testing.assert_allclose(obs, np.array([[12.0, 0.0],
+                                                  [5.0, np.nan]],
+                                                 dtype=np.float64))
+
+        obs = make_2D_array(example_df, data_col='Sample', rows=2, cols=2)
+        self.assertEqual(obs.dtype, object)
+        np.testing.assert_array_equal(obs, np.array([['sam1', 'sam2'],
+                                                     ['sam3', None]]))
+
+    def test_make_2D_array_bad_wells(self):
+        example_df = pd.DataFrame({'Cp': [12, 0],
+                                   'Pos': ['A1', 'B1x']})
+
+        with self.assertRaisesRegex(ValueError, 'Well IDs must be'):
+            make_2D_array(example_df, rows=2, cols=2)
+
+        example_df['Pos'] = ['A1', 'B\u00b9']
+        with self.assertRaisesRegex(ValueError, 'Well IDs must be'):
+            make_2D_array(example_df, rows=2, cols=2)
+
+        # whitespace around the number is ignored
+        example_df['Pos'] = ['A1 ', ' B 2']
+        obs = make_2D_array(example_df, rows=2, cols=2)
+        npt.assert_array_equal(obs, [[12, np.nan], [np.nan, 0]])
+
+    def test_combine_dfs(self):
         test_index_picklist_f = (
             '\tWell Number\tPlate\tSample Name\tSource Plate Name\t'
             'Source Plate Type\tCounter\tPrimer\tSource Well\tIndex\t'
@@ -617,74 +849,75 @@ class Tests(TestCase):
             '6\t1\t384LDV_AQ_B2_HT\tC1\t17.582063\t57.5\tNormalizedDNA\tC1')
 
         test_qpcr_f = (
-            '\tInclude\tColor\tPos\tName\tCp\tConcentration\tStandard\tStatus'
-            '0\tTRUE\t255\tA1\tSample 1\t20.55\tNaN\t0\tNaN'
+            '\tInclude\tColor\tPos\tName\tCp\tConcentration\tStandard\t'
+            'Status\n'
+            '0\tTRUE\t255\tA1\tSample 1\t20.55\tNaN\t0\tNaN\n'
             '1\tTRUE\t255\tC1\tSample 2\t9.15\tNaN\t0\tNaN')
 
-        exp_out_f = (
-            'Well\tCp\tDNA Concentration\tDNA Transfer Volume\tSample Name\t'
-            'Plate\tCounter\tPrimer i7\tSource Well i7\tIndex i7\tPrimer i5\t'
-            'Source Well i5\tIndex i5'
-            'A1\t20.55\t12.751753\t80.0\t8_29_13_rk_rh\tABTX_35\t1841.0\t'
-            'iTru7_110_05\tA23\tCGCTTAAC\tiTru5_01_G\tG1\tGTTCCATG'
-            'C1\t9.15\t17.582063\t57.5\t8_29_13_rk_lh\tABTX_35\t1842.0\t'
-            'iTru7_110_06\tB23\tCACCACTA\tiTru5_01_H\tH1\tTAGCTGAG')
-
         test_index_picklist_df = pd.read_csv(
             StringIO(test_index_picklist_f), header=0, sep='\t')
         test_dna_picklist_df = pd.read_csv(
             StringIO(test_dna_picklist_f), header=0, sep='\t')
         test_qpcr_df = pd.read_csv(StringIO(test_qpcr_f), header=0, sep='\t')
 
-        exp_df = pd.read_csv(StringIO(exp_out_f), header=0, sep='\t')
-
         combined_df = combine_dfs(
             test_qpcr_df, test_dna_picklist_df, test_index_picklist_df)
 
-        pd.testing.assert_frame_equal(combined_df, exp_df, check_like=True)
+        pd.testing.assert_frame_equal(combined_df, COMBINED_DF)
+
+        # a repeated destination well cannot be matched to a single sample
+        repeated_dna = pd.concat([test_dna_picklist_df,
+                                  test_dna_picklist_df.iloc[[-1]]])
+        with self.assertRaisesRegex(ValueError, 'The DNA picklist has '
+                                                'repeated destination wells'):
+            combine_dfs(test_qpcr_df, repeated_dna, test_index_picklist_df)
+
+        repeated_index = pd.concat([test_index_picklist_df,
+                                    test_index_picklist_df.iloc[[-1]]])
+        with self.assertRaisesRegex(ValueError, 'The i7 index picklist has '
+                                                'repeated destination wells'):
+            combine_dfs(test_qpcr_df, test_dna_picklist_df, repeated_index)
 
     def test_add_dna_conc(self):
-        test_dna = 'Well\tpico_conc\nA1\t2.5\nC1\t20'
-
-        test_combined = (
-            'Well\tCp\tDNA Concentration\tDNA Transfer Volume\tSample Name'
-            '\tPlate\tCounter\tPrimer i7\tSource Well i7\tIndex i7\tPrimer i5'
-            '\tSource Well i5\tIndex i5\n'
-            'A1\t20.55\t12.751753\t80.0\t8_29_13_rk_rh\tABTX_35\t1841.0\t'
-            'iTru7_110_05\tA23\tCGCTTAAC\tiTru5_01_G\tG1\tGTTCCATG\n'
-            'C1\t9.15\t17.582063\t57.5\t8_29_13_rk_lh\tABTX_35\t1842.0\t'
-            'iTru7_110_06\tB23\tCACCACTA\tiTru5_01_H\tH1\tTAGCTGAG')
-
-        test_exp_out = (
-            'Well\tCp\tDNA Concentration\tDNA Transfer Volume\t'
-            'Sample Name\tPlate\tCounter\tPrimer i7\tSource Well i7\tIndex i7'
-            '\tPrimer i5\tSource Well i5\tIndex i5\tpico_conc\n'
-            'A1\t20.55\t12.751753\t80.0\t8_29_13_rk_rh\tABTX_35\t1841.0\t'
-            'iTru7_110_05\tA23\tCGCTTAAC\tiTru5_01_G\tG1\tGTTCCATG\t2.5\n'
-            'C1\t9.15\t17.582063\t57.5\t8_29_13_rk_lh\tABTX_35\t1842.0\t'
-            'iTru7_110_06\tB23\tCACCACTA\tiTru5_01_H\tH1\tTAGCTGAG\t20')
-
-        exp_df = pd.read_csv(StringIO(test_exp_out), header=0, sep='\t')
-        test_in_df = pd.read_csv(StringIO(test_combined), header=0, sep='\t')
-        test_dna_df = pd.read_csv(StringIO(test_dna), header=0, sep='\t')
-
-        obs_df = add_dna_conc(test_in_df, test_dna_df)
-
-        pd.testing.assert_frame_equal(obs_df, exp_df, check_like=True)
+        test_dna_df = pd.DataFrame({'Well': ['A1', 'C1'],
+                                    'pico_conc': [2.5, 20.0]})
+
+        exp_df = COMBINED_DF.assign(pico_conc=[2.5, 20.0])
+
+        obs_df = add_dna_conc(COMBINED_DF, test_dna_df)
+
+        pd.testing.assert_frame_equal(obs_df, exp_df)
 
     def test_compute_pico_concentration(self):
         obs = compute_pico_concentration(self.dna_vals)
         exp = self.pico_conc
 
+        self.assertIsInstance(obs, np.ndarray)
+        self.assertIs(obs.dtype.type, np.float64)
+        self.assertTrue(obs.flags.c_contiguous)
         npt.assert_allclose(obs, exp)
+        npt.assert_allclose(obs[0], [38.4090909, 29.8863636, 29.9242424,
+                                     58.6363636])
 
     def test_bcl_scrub_name(self):
-        self.assertEqual('test_1', bcl_scrub_name('test.1'))
-        self.assertEqual('test-1', bcl_scrub_name('test-1'))
-        self.assertEqual('test_1', bcl_scrub_name('test_1'))
+        for name, exp in (('test.1', 'test_1'), ('test-1', 'test-1'),
+                          ('test_1', 'test_1')):
+            with self.subTest(name=name):
+                self.assertEqual(exp, bcl_scrub_name(name))
 
     def test_rc(self):
-        self.assertEqual(rc('AGCCT'), 'AGGCT')
+        for seq, exp in (('AGCCT', 'AGGCT'), ('', ''), ('ACNGT', 'ACNGT')):
+            with self.subTest(seq=seq):
+                self.assertEqual(rc(seq), exp)
+
+    def test_rc_bulk(self):
+        rand = random.Random(0)
+        table = bytes.maketrans(b'ACGT', b'TGCA')
+
+        for _ in range(1000):
+            seq = ''.join(rand.choices('ACGTN', k=rand.randint(0, 1000)))
+            exp = seq.encode().translate(table)[::-1].decode()
+            self.assertEqual(rc(seq), exp)
 
     def test_sequencer_i5_index(self):
         indices = ['AGCT', 'CGGA', 'TGCC']
@@ -699,144 +932,40 @@ class Tests(TestCase):
         self.assertListEqual(obs_hiseq25k, indices)
         self.assertListEqual(obs_nextseq, exp_rc)
 
+        obs_bulk = sequencer_i5_index('HiSeq4000', np.array(indices * 10000))
+        np.testing.assert_array_equal(obs_bulk, exp_rc * 10000)
+
+        self.assertListEqual(sequencer_i5_index('HiSeq4000', []), [])
+
         with self.assertRaises(ValueError):
             sequencer_i5_index('foo', indices)
 
     def test_reformat_interleaved_to_columns(self):
-        wells = ['A1', 'A23', 'C1', 'C23',
-                 'A2', 'A24', 'C2', 'C24',
-                 'B1', 'B23', 'D1', 'D23',
-                 'B2', 'B24', 'D2', 'D24']
-
-        exp = ['A1', 'B6', 'C1', 'D6',
-               'A7', 'B12', 'C7', 'D12',
-               'A13', 'B18', 'C13', 'D18',
-               'A19', 'B24', 'C19', 'D24']
-
-        obs = reformat_interleaved_to_columns(wells)
-
-        np.testing.assert_array_equal(exp, obs)
-
-    def test_extract_stats_metadata_plus_sum_lanes_single_lane(self):
-        fp = 'notebooks/test_data/Demux/Stats.json'
-        obs_lm, obs_df, obs_unk = extract_stats_metadata(fp, [5])
-
-        # test legacy, degenerate case of summing one lane.
-        obs_df = sum_lanes(obs_df, [5])
-        obs_unk = sum_lanes(obs_unk, [5])
-
-        exp_lm = {"Flowcell": "HLHWHBBXX",
-                  "RunNumber": 458,
-                  "RunId": "171006_K00180_0458_AHLHWHBBXX_RKL003_FinRisk_17_48"
-                  }
-        # compare lane metadata
-        self.assertDictEqual(obs_lm, exp_lm)
-
-        # compare data-frames (first row and last row only)
-        obs_fr = obs_df.iloc[[0]].to_dict(orient='records')[0]
-        obs_lr = obs_df.iloc[[-1]].to_dict(orient='records')[0]
-
-        exp_fr = {
-            "Mismatch0": 137276,
-            "Mismatch1": 6458,
-            "NumberReads": 143734,
-            "YieldR1": 21703834,
-            "YieldQ30R1": 19772948,
-            "YieldR2": 21703834,
-            "YieldQ30R2": 17555284,
-            "Yield": 43407668
-        }
-
-        exp_lr = {
-            "Mismatch0": 894502,
-            "Mismatch1": 42048,
-            "NumberReads": 936550,
-            "YieldR1": 141419050,
-            "YieldQ30R1": 126289116,
-            "YieldR2": 141419050,
-            "YieldQ30R2": 116636541,
-            "Yield": 282838100
-        }
-        self.assertDictEqual(obs_fr, exp_fr)
-        self.assertDictEqual(obs_lr, exp_lr)
-
-        # compare unknown barcodes output (first row and last row only)
-        obs_fr = obs_unk.iloc[[0]].to_dict(orient='records')[0]
-        obs_lr = obs_unk.iloc[[-1]].to_dict(orient='records')[0]
-
-        exp_fr = {
-            "Mismatch0": 137276,
-            "Mismatch1": 6458,
-            "NumberReads": 143734,
-            "YieldR1": 21703834,
-            "YieldQ30R1": 19772948,
-            "YieldR2": 21703834,
-            "YieldQ30R2": 17555284,
-            "Yield": 43407668
-        }
-
-        exp_lr = {
-            "Mismatch0": 894502,
-            "Mismatch1": 42048,
-            "NumberReads": 936550,
-            "YieldR1": 141419050,
-            "YieldQ30R1": 126289116,
-            "YieldR2": 141419050,
-            "YieldQ30R2": 116636541,
-            "Yield": 282838100
-        }
-        self.assertDictEqual(obs_fr, {"Value": 67880})
-        self.assertDictEqual(obs_lr, {"Value": 2440})
-
-    def test_extract_stats_metadata_plus_sum_lanes_two_lanes(self):
-        fp = 'notebooks/test_data/Demux/OverlapSeqStats.json'
-        _, obs_df, obs_unk = extract_stats_metadata(fp, [5, 1])
-
-        # test legacy, degenerate case of summing one lane.
-        obs_df = sum_lanes(obs_df, [5, 1])
-        obs_unk = sum_lanes(obs_unk, [5, 1])
-
-        # compare data-frames
-        obs_fr = obs_df.iloc[[0]].to_dict(orient='records')[0]
-        obs_lr = obs_df.iloc[[-1]].to_dict(orient='records')[0]
-
-        exp_fr = {
-            "Mismatch0": 6917044,
-            "Mismatch1": 452990,
-            "NumberReads": 7376278,
-            "YieldR1": 1106441700,
-            "YieldQ30R1": 875757969,
-            "YieldR2": 1106441700,
-            "YieldQ30R2": 676057515,
-            "Yield": 2212883400
-        }
-        exp_lr = {
-            "Mismatch0": 5075088,
-            "Mismatch1": 368852,
-            "NumberReads": 16174348,
-            "YieldR1": 2426152200,
-            "YieldQ30R1": 1913639164,
-            "YieldR2": 2426152200,
-            "YieldQ30R2": 1472852479,
-            "Yield": 4852304400
-        }
-
-        self.assertDictEqual(obs_fr, exp_fr)
-        self.assertDictEqual(obs_lr, exp_lr)
-
-        # compare unknown barcodes output (first row and last row only)
-        obs_fr = obs_unk.iloc[[0]].to_dict(orient='records')[0]
-        obs_lr = obs_unk.iloc[[-1]].to_dict(orient='records')[0]
-
-        exp_fr = {
-            "Value": 5103.0
-        }
-        exp_lr = {
-            "Value": 6336.0
-        }
-
-        self.assertDictEqual(obs_fr, exp_fr)
-        self.assertDictEqual(obs_lr, exp_lr)
+        obs = reformat_interleaved_to_columns(WELLS_INTERLEAVED)
+
+        np.testing.assert_array_equal(WELLS_COLUMNAR, obs)
+
+    def test_extract_stats_metadata_plus_sum_lanes(self):
+        for fp, lanes, exp_lm, exp_df, exp_unk in DEMUX_STATS_CASES:
+            with self.subTest(fp=fp, lanes=lanes):
+                obs_lm, obs_df, obs_unk = extract_stats_metadata(
+                    fp, list(lanes))
+
+                # summing one lane is the legacy, degenerate case
+                obs_df = sum_lanes(obs_df, lanes)
+                obs_unk = sum_lanes(obs_unk, lanes)
+
+                # compare lane metadata
+                self.assertDictEqual(obs_lm, dict(exp_lm))
+
+                # compare data-frames (first row and last row only)
+                self.assertRowEqual(obs_df.iloc[0], exp_df[0])
+                self.assertRowEqual(obs_df.iloc[-1], exp_df[1])
+
+                # compare unknown barcodes output (first row and last row
+                # only)
+                self.assertRowEqual(obs_unk.iloc[0], exp_unk[0])
+                self.assertRowEqual(obs_unk.iloc[-1], exp_unk[1])
 
 
 if __name__ == "__main__":
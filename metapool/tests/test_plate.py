@@ -11,15 +11,26 @@ from metapool.metapool import (read_plate_map_csv, read_pico_csv,
                                calculate_norm_vol, assign_index,
                                compute_pico_concentration)
 
+# column types of the index combination files, declared so that reading them
+# skips type inference
+INDEX_COMBO_DTYPES = {'index combo': 'int64', 'index combo seq': str,
+                      'i5 name': str, 'i5 sequence': str, 'i5 well': str,
+                      'i5 plate': str, 'i7 name': str, 'i7 sequence': str,
+                      'i7 well': str, 'i7 plate': str}
+
 
 class DilutionTests(TestCase):
-    def test_dilution_test(self):
+    @classmethod
+    def setUpClass(cls):
+        # the plate map with its gDNA concentrations, shared by all the tests
         plate_df = read_plate_map_csv('notebooks/test_data/Plate_Maps/Finrisk'
                                       ' 33-36_plate_map.tsv')
-        sample_concs = read_pico_csv(open('notebooks/test_data/Quant/MiniPico'
-                                          '/FinRisk_33-36_gDNA_quant.tsv',
-                                          'r'))
-        plate_df = pd.merge(plate_df, sample_concs, on='Well')
+        sample_concs = read_pico_csv('notebooks/test_data/Quant/MiniPico/'
+                                     'FinRisk_33-36_gDNA_quant.tsv')
+        cls.gdna_plate_df = pd.merge(plate_df, sample_concs, on='Well')
+
+    def test_dilution_test(self):
+        plate_df = self.gdna_plate_df.copy()
 
         self.assertFalse(requires_dilution(plate_df,
                                            threshold=20,
@@ -55,13 +66,7 @@ class DilutionTests(TestCase):
         self.assertEqual(plate_df['Sample DNA Concentration'][10], 1.0595)
 
     def test_find_threshold_autopool(self):
-        plate_map_fp = ('notebooks/test_data/Plate_Maps/'
-                        'Finrisk 33-36_plate_map.tsv')
-        plate_df = read_plate_map_csv(plate_map_fp)
-        sample_concs_fp = ('notebooks/test_data/Quant/MiniPico/'
-                           'FinRisk_33-36_gDNA_quant.tsv')
-        sample_concs = read_pico_csv(open(sample_concs_fp, 'r'))
-        plate_df = pd.merge(plate_df, sample_concs, on='Well')
+        plate_df = self.gdna_plate_df.copy()
         total_vol = 3500
         dna_vols = calculate_norm_vol(plate_df['Sample DNA Concentration'],
                                       ng=5, min_vol=25, max_vol=3500,
@@ -70,7 +75,8 @@ class DilutionTests(TestCase):
         plate_df['Normalized water volume'] = total_vol - dna_vols
         plate_df['Library Well'] = plate_df['Well']
         index_combos = pd.read_csv('notebooks/test_output/iTru/'
-                                   'temp_iTru_combos.csv')
+                                   'temp_iTru_combos.csv', engine='c',
+                                   dtype=INDEX_COMBO_DTYPES)
         indices = assign_index(len(plate_df['Sample']),
                                index_combos,
                                start_idx=0).reset_index()
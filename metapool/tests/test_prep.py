@@ -227,7 +227,8 @@ class TestPrep(TestCase):
     def test_preparations_for_run_mf(self):
         # mf has a header w/mixed case. This will test whether mapping-file
         # headers are properly converted to all lower-case.
-        mf = pandas.read_csv(self.mf, delimiter='\t')
+        mf = pandas.read_csv(self.mf, delimiter='\t', engine='c',
+                             low_memory=False)
 
         # obs will be a dictionary of dataframes, with the keys being
         # a triplet of strings, rather than a single string.
@@ -36,7 +36,7 @@ with open('README.md') as f:
 
 keywords = 'microbiome wetlab bioinformatics',
 
-base = ['numpy', 'pandas', 'matplotlib >= 2.0', 'seaborn >= 0.7.1', 'click',
+base = ['numpy', 'pandas', 'matplotlib >= 2.0', 'seaborn >= 0.11', 'click',
         'sample_sheet', 'openpyxl', 'qiita_client @ https://github.com/'
         'qiita-spots/qiita_client/archive/master.zip', 'scikit-learn']
 test = ["nose", "pep8", "flake8"]